@@ -1,7 +1,7 @@
 """Run range query on RAPTOR algorithm"""
 import argparse
 from typing import Dict, List
-from copy import copy
+from concurrent.futures import ProcessPoolExecutor
 from time import perf_counter
 
 from loguru import logger
@@ -84,12 +84,36 @@ def main(
     # All destinations are calculated, however, we only print one for logging purposes
     for destination_station in journeys_to_destinations.keys():
         with open(f'data/output/optimal/{origin_station}_to_{destination_station}.json', 'w+') as f:
-            output = []
-            for jrny in journeys_to_destinations[destination_station]:
-                journey_dict = jrny.serialize()
-                output.append(journey_dict)
-            json_output = json.dumps(output, indent=4) 
-            f.write(json_output)
+            # Stream straight to the file instead of building one giant
+            # indented string in memory first
+            json.dump(
+                [
+                    jrny.serialize()
+                    for jrny in journeys_to_destinations[destination_station]
+                ],
+                f,
+            )
+
+
+# Worker state, assigned once per worker process by the pool initializer so
+# the timetable is not re-pickled for every departure time
+_worker_timetable = None
+_worker_from_stops = None
+_worker_max_rounds = None
+
+
+def _init_worker(timetable: Timetable, from_stops, max_rounds: int):
+    """Store the shared query state on the worker process"""
+    global _worker_timetable, _worker_from_stops, _worker_max_rounds
+    _worker_timetable = timetable
+    _worker_from_stops = from_stops
+    _worker_max_rounds = max_rounds
+
+
+def _solve_departure(dep_secs: int):
+    """Run McRaptor for a single departure time"""
+    mcraptor = McRaptorAlgorithm(_worker_timetable)
+    return mcraptor.run(_worker_from_stops, dep_secs, _worker_max_rounds)
 
 
 def run_range_mcraptor(
@@ -129,18 +153,19 @@ def run_range_mcraptor(
 
     logger.info("Calculating journeys to all destinations")
     s = perf_counter()
-    # Find Pareto-optimal journeys for all possible departure times
-    for dep_index, dep_secs in enumerate(potential_dep_secs):
+    # Find Pareto-optimal journeys for all possible departure times. Each
+    # departure time is solved independently in a worker process; the
+    # timetable is read-only after construction so it is shipped to each
+    # worker once via the initializer. The cross-iteration last_round_bag
+    # seeding was only a warm-start heuristic and is dropped here.
+    with ProcessPoolExecutor(
+        initializer=_init_worker, initargs=(timetable, from_stops, max_rounds)
+    ) as executor:
+        results = list(executor.map(_solve_departure, potential_dep_secs))
+
+    for dep_index, (bag_round_stop, actual_rounds) in enumerate(results):
         logger.info(f"Processing {dep_index} / {len(potential_dep_secs)}")
-        logger.info(f"Analyzing best journey for departure time {sec2str(dep_secs)}")
-
-        # Run Round-Based Algorithm
-        mcraptor = McRaptorAlgorithm(timetable)
-        if dep_index == 0:
-            bag_round_stop, actual_rounds = mcraptor.run(from_stops, dep_secs, max_rounds)
-        else:
-            bag_round_stop, actual_rounds = mcraptor.run(from_stops, dep_secs, max_rounds, last_round_bag)
-        last_round_bag = copy(bag_round_stop[actual_rounds])
+        last_round_bag = bag_round_stop[actual_rounds]
 
         # Determine the best destination ID, destination is a platform
         for destination_station_name, to_stops in destination_stops.items():
@@ -156,15 +181,14 @@ def run_range_mcraptor(
 
     logger.info(f"Journey calculation time: {perf_counter() - s}")
 
-    # Keep unique journeys
+    # Keep unique journeys; Journey is hashable so an ordered dict dedups in
+    # O(n) while preserving insertion order
     for destination_station_name, journeys in journeys_to_destinations.items():
-        unique_journeys = []
-        for journey in journeys:
-            if not journey in unique_journeys:
-                unique_journeys.append(journey)
+        journeys_to_destinations[destination_station_name] = list(
+            dict.fromkeys(journeys)
+        )
+
 
-        journeys_to_destinations[destination_station_name] = unique_journeys
-        
     return journeys_to_destinations
 
 
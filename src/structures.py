@@ -30,6 +30,53 @@ class Timetable:
     trip_stop_times: TripStopTimes = None
     routes: Routes = None
     transfers: Transfers = None
+    # Structure-of-arrays view of the trip stop times, built by
+    # build_arrays() for vectorized scans over contiguous int32 data
+    tst_trip_idx: np.ndarray = None
+    tst_stop_idx: np.ndarray = None
+    tst_arrival: np.ndarray = None
+    tst_departure: np.ndarray = None
+    trip_to_tst_range: np.ndarray = None
+    route_to_trips: Dict[int, np.ndarray] = None
+
+    def build_arrays(self) -> None:
+        """
+        Flatten the trip stop times into parallel int32 arrays, one row per
+        trip stop time ordered by trip id and stop index. trip_to_tst_range
+        holds the [start, stop) row range of each trip (indexed by trip id)
+        and route_to_trips maps a route id to the ids of its trips, so the
+        RAPTOR inner loops can scan contiguous arrays with e.g.
+        np.searchsorted instead of chasing Trip/Stop object pointers.
+        """
+        tst_trip_idx = []
+        tst_stop_idx = []
+        tst_arrival = []
+        tst_departure = []
+        trip_to_tst_range = np.zeros((self.trips.last_id, 2), dtype=np.int32)
+
+        for trip_id in sorted(self.trips.set_idx):
+            trip = self.trips[trip_id]
+            start = len(tst_trip_idx)
+            for trip_stop_time in trip.stop_times:
+                tst_trip_idx.append(trip_id)
+                tst_stop_idx.append(trip_stop_time.stop.index)
+                tst_arrival.append(trip_stop_time.dts_arr)
+                tst_departure.append(trip_stop_time.dts_dep)
+            trip_to_tst_range[trip_id] = (start, len(tst_trip_idx))
+
+        self.tst_trip_idx = np.array(tst_trip_idx, dtype=np.int32)
+        self.tst_stop_idx = np.array(tst_stop_idx, dtype=np.int32)
+        self.tst_arrival = np.array(tst_arrival, dtype=np.int32)
+        self.tst_departure = np.array(tst_departure, dtype=np.int32)
+        self.trip_to_tst_range = trip_to_tst_range
+        self.route_to_trips = {
+            route.id: np.fromiter(
+                (trip.id for trip in route.trips),
+                dtype=np.int32,
+                count=len(route.trips),
+            )
+            for route in self.routes
+        }
 
     def counts(self) -> None:
         """Print timetable counts"""
@@ -247,6 +294,7 @@ class Trip:
     stop_times = attr.ib(default=attr.Factory(list))
     stop_times_index = attr.ib(default=attr.Factory(dict))
     long_name = attr.ib(default=None)  # e.g., Sprinter
+    hint = attr.ib(default=None)  # e.g., train number
 
     def __hash__(self):
         return hash(self.id)
@@ -638,7 +686,7 @@ class Bag:
         return min([self.labels[i].earliest_arrival_time for i in range(len(self))])
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, eq=False)
 class Journey:
     """
     Journey from origin to destination specified as Legs
@@ -652,6 +700,26 @@ class Journey:
     def __repr__(self):
         return f"Journey(n_legs={len(self.legs)})"
 
+    def _legs_info(self) -> tuple:
+        """Tuple of the leg fields, used for equality and hashing"""
+        return tuple(
+            (
+                leg.from_stop,
+                leg.to_stop,
+                leg.trip,
+                leg.earliest_arrival_time,
+                leg.fare,
+                leg.n_trips,
+            )
+            for leg in self.legs
+        )
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self._legs_info() == other._legs_info()
+
+    def __hash__(self):
+        return hash(self._legs_info())
+
     def __getitem__(self, index):
         return self.legs[index]
 
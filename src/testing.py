@@ -5,37 +5,26 @@ import argparse
 from typing import Dict, List, Set, Any
 from pathlib import Path
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import sys
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 def load_json_file(filepath: str) -> List[Dict]:
-    """Load and parse a JSON file"""
+    """Load and parse a JSON file, using orjson when available"""
     try:
-        with open(filepath, 'r') as f:
-            return json.load(f)
+        with open(filepath, 'rb') as f:
+            data = f.read()
+        return orjson.loads(data) if orjson is not None else json.loads(data)
     except FileNotFoundError:
         return []
-    except json.JSONDecodeError as e:
+    except ValueError as e:
         print(f"Error parsing JSON in {filepath}: {e}")
         return []
 
-def normalize_journey(journey: Dict) -> Dict:
-    """Normalize a journey dict for consistent comparison"""
-    # Create a copy to avoid modifying the original
-    normalized = journey.copy()
-    
-    # Sort any lists that might have different orders but same content
-    if 'legs' in normalized and isinstance(normalized['legs'], list):
-        # Sort legs by departure time or some consistent key
-        try:
-            normalized['legs'] = sorted(normalized['legs'], 
-                                      key=lambda x: (x.get('departure_time', ''), 
-                                                   x.get('route_id', ''),
-                                                   x.get('from_stop', '')))
-        except (KeyError, TypeError):
-            pass  # Keep original order if sorting fails
-    
-    return normalized
-
 def journey_to_comparable_tuple(journey: Dict) -> tuple:
     """Convert journey to a tuple for set operations and comparison"""
     try:
@@ -44,7 +33,7 @@ def journey_to_comparable_tuple(journey: Dict) -> tuple:
         arrival_time = journey.get('arrival_time')
         total_duration = journey.get('total_duration')
         num_transfers = journey.get('num_transfers', 0)
-        
+
         # Create a tuple of leg information
         legs_info = []
         if 'legs' in journey and isinstance(journey['legs'], list):
@@ -57,19 +46,25 @@ def journey_to_comparable_tuple(journey: Dict) -> tuple:
                     leg.get('arrival_time')
                 )
                 legs_info.append(leg_tuple)
-        
+            # Sort the leg tuples directly (departure time, route, from stop)
+            # instead of copying and re-sorting the journey dict first
+            try:
+                legs_info.sort(key=lambda leg: (leg[3], leg[0], leg[1]))
+            except TypeError:
+                pass  # Keep original order if sorting fails
+
         return (departure_time, arrival_time, total_duration, num_transfers, tuple(legs_info))
-    
+
     except Exception as e:
         print(f"Warning: Could not create comparable tuple for journey: {e}")
         return (str(journey),)  # Fallback to string representation
 
 def compare_journey_sets(original_journeys: List[Dict], parallel_journeys: List[Dict]) -> Dict:
     """Compare two sets of journeys and return detailed comparison"""
-    
+
     # Convert to sets of comparable tuples
-    original_set = {journey_to_comparable_tuple(normalize_journey(j)) for j in original_journeys}
-    parallel_set = {journey_to_comparable_tuple(normalize_journey(j)) for j in parallel_journeys}
+    original_set = {journey_to_comparable_tuple(j) for j in original_journeys}
+    parallel_set = {journey_to_comparable_tuple(j) for j in parallel_journeys}
     
     # Find differences
     only_in_original = original_set - parallel_set
@@ -129,16 +124,21 @@ def compare_directories(original_dir: str, parallel_dir: str, verbose: bool = Fa
     print("DETAILED COMPARISON RESULTS")
     print("="*80)
     
+    def compare_file(filename: str) -> tuple:
+        """Load and compare one pair of output files"""
+        original_journeys = load_json_file(str(original_path / filename))
+        parallel_journeys = load_json_file(str(parallel_path / filename))
+        return filename, compare_journey_sets(original_journeys, parallel_journeys)
+
+    # Loading the files is I/O bound, so overlap the reads with a thread
+    # pool and report in deterministic order afterwards
+    with ThreadPoolExecutor() as executor:
+        comparisons = dict(executor.map(compare_file, sorted(common_files)))
+
     for filename in sorted(common_files):
-        original_file = original_path / filename
-        parallel_file = parallel_path / filename
-        
-        original_journeys = load_json_file(str(original_file))
-        parallel_journeys = load_json_file(str(parallel_file))
-        
-        comparison = compare_journey_sets(original_journeys, parallel_journeys)
+        comparison = comparisons[filename]
         comparison_results[filename] = comparison
-        
+
         if not comparison['identical']:
             total_differences += 1
             print(f"\n📍 {filename}:")
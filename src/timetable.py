@@ -1,16 +1,22 @@
 """Parse timetable from GTFS files"""
 import os
+import hashlib
 import argparse
 from typing import List
 from dataclasses import dataclass
-from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import permutations
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 from loguru import logger
 import datetime
 
 from dao_timetable import write_timetable
-from util import mkdir_if_not_exists, str2sec, TRANSFER_COST
+from util import mkdir_if_not_exists, TRANSFER_COST
 from structures import (
     Timetable,
     Stop,
@@ -37,6 +43,17 @@ class GtfsTimetable:
     stops = None
 
 
+GTFS_CACHE_TABLES = ["trips", "calendar", "stop_times", "stops"]
+GTFS_SOURCE_FILES = [
+    "agency.txt",
+    "routes.txt",
+    "trips.txt",
+    "calendar.txt",
+    "stop_times.txt",
+    "stops.txt",
+]
+
+
 def parse_arguments():
     """Parse arguments"""
     parser = argparse.ArgumentParser()
@@ -75,22 +92,140 @@ def main(
     logger.info("Parse timetable from GTFS files")
     mkdir_if_not_exists(output_folder)
 
-    gtfs_timetable = None
-    for entry in os.scandir(input_folder):  
-        if entry.is_dir():
-            resulting_timetable = read_gtfs_timetable(entry.path, departure_date, agencies)
-            if gtfs_timetable == None:
-                gtfs_timetable = resulting_timetable
-            else: 
-                gtfs_timetable.stop_times = pd.concat([resulting_timetable.stop_times, gtfs_timetable.stop_times]).drop_duplicates().reset_index(drop=True)
-                gtfs_timetable.stops = pd.concat([resulting_timetable.stops, gtfs_timetable.stops]).drop_duplicates().reset_index(drop=True)
-                gtfs_timetable.trips = pd.concat([resulting_timetable.trips, gtfs_timetable.trips]).drop_duplicates().reset_index(drop=True)
-                gtfs_timetable.calendar = pd.concat([resulting_timetable.calendar, gtfs_timetable.calendar]).drop_duplicates().reset_index(drop=True)
+    # Parse the agency folders concurrently; each worker reads one folder so
+    # disk I/O of one overlaps parse work of another
+    folders = [entry.path for entry in os.scandir(input_folder) if entry.is_dir()]
+    with ProcessPoolExecutor() as executor:
+        results = list(
+            executor.map(
+                partial(_cached_read, departure_date=departure_date, agencies=agencies),
+                folders,
+            )
+        )
+
+    stops_list = [result.stops for result in results]
+    stop_times_list = [result.stop_times for result in results]
+    trips_list = [result.trips for result in results]
+    calendar_list = [result.calendar for result in results]
+
+    # Concatenate and deduplicate once instead of rematerializing the growing
+    # frames for every agency folder
+    gtfs_timetable = GtfsTimetable()
+    gtfs_timetable.stops = pd.concat(
+        stops_list, ignore_index=True, copy=False
+    ).drop_duplicates()
+    # stop_times must be re-sorted after the cross-folder merge: when the
+    # same trip appears in several folders, drop_duplicates leaves its rows
+    # in folder order, not stop_sequence order
+    gtfs_timetable.stop_times = (
+        pd.concat(stop_times_list, ignore_index=True, copy=False)
+        .drop_duplicates()
+        .sort_values(["trip_id", "stop_sequence"], kind="stable")
+        .reset_index(drop=True)
+    )
+    gtfs_timetable.trips = pd.concat(
+        trips_list, ignore_index=True, copy=False
+    ).drop_duplicates()
+    gtfs_timetable.calendar = pd.concat(
+        calendar_list, ignore_index=True, copy=False
+    ).drop_duplicates()
 
     timetable = gtfs_to_pyraptor_timetable(gtfs_timetable, icd_fix)
     write_timetable(output_folder, timetable)
 
 
+def _isin_mask(column: pd.Series, values: pd.Series) -> np.ndarray:
+    """
+    Boolean membership mask for `column in values`, computed with pyarrow's
+    multithreaded is_in kernel instead of pandas' Python-side hash sets.
+    """
+    column_arr = pa.Array.from_pandas(column)
+    # Cast so an empty value set (inferred as null type) still matches
+    value_arr = pa.Array.from_pandas(values).cast(column_arr.type)
+    return pc.is_in(column_arr, value_set=value_arr).to_numpy(zero_copy_only=False)
+
+
+def _hms_to_sec(column: pd.Series) -> pd.Series:
+    """
+    Vectorized str2sec: convert a whole hh:mm:ss column to seconds since
+    midnight by parsing the raw digit bytes in one NumPy pass, without
+    materializing intermediate split-string columns. Missing or malformed
+    values (NaN, more than 8 characters, non-digits in the digit positions)
+    raise a ValueError instead of being silently mis-parsed.
+    """
+    invalid = column.isna() | (column.str.len() > 8)
+    if invalid.any():
+        raise ValueError(
+            f"Invalid hh:mm:ss values in {column.name}: "
+            f"{column[invalid].unique()[:5]}"
+        )
+    raw = column.str.zfill(8).to_numpy(dtype="S8")
+    digits = (raw.view(np.uint8).reshape(-1, 8) - ord("0")).astype(np.int32)
+    digit_positions = digits[:, [0, 1, 3, 4, 6, 7]]
+    separator_positions = digits[:, [2, 5]]  # ':' is 10 after the '0' offset
+    malformed = ~(
+        ((digit_positions >= 0) & (digit_positions <= 9)).all(axis=1)
+        & (separator_positions == ord(":") - ord("0")).all(axis=1)
+    )
+    if malformed.any():
+        raise ValueError(
+            f"Invalid hh:mm:ss values in {column.name}: "
+            f"{column[malformed].unique()[:5]}"
+        )
+    seconds = (
+        digits[:, 0] * 36000
+        + digits[:, 1] * 3600
+        + digits[:, 3] * 600
+        + digits[:, 4] * 60
+        + digits[:, 6] * 10
+        + digits[:, 7]
+    )
+    return pd.Series(seconds, index=column.index)
+
+
+def _cached_read(
+    input_folder: str, departure_date: str, agencies: List[str]
+) -> GtfsTimetable:
+    """
+    Read a GTFS folder through a parquet cache. The first read of a folder
+    parses the CSV files and writes the resulting tables as parquet to
+    `{input_folder}/.cache/{key}`; later runs with unchanged source files
+    load the parquet directly and skip the CSV parse entirely.
+    """
+    key = hashlib.md5(
+        f"{departure_date}-{'-'.join(sorted(agencies))}".encode()
+    ).hexdigest()[:12]
+    cache_folder = os.path.join(input_folder, ".cache", key)
+    cache_paths = {
+        table: os.path.join(cache_folder, f"{table}.parquet")
+        for table in GTFS_CACHE_TABLES
+    }
+    source_mtime = max(
+        os.path.getmtime(os.path.join(input_folder, name))
+        for name in GTFS_SOURCE_FILES
+        if os.path.exists(os.path.join(input_folder, name))
+    )
+
+    if all(os.path.exists(path) for path in cache_paths.values()) and all(
+        os.path.getmtime(path) >= source_mtime for path in cache_paths.values()
+    ):
+        logger.debug(f"Using cached parquet for {input_folder}")
+        gtfs_timetable = GtfsTimetable()
+        for table, path in cache_paths.items():
+            setattr(gtfs_timetable, table, pd.read_parquet(path, engine="pyarrow"))
+        return gtfs_timetable
+
+    gtfs_timetable = read_gtfs_timetable(input_folder, departure_date, agencies)
+
+    mkdir_if_not_exists(cache_folder)
+    for table, path in cache_paths.items():
+        getattr(gtfs_timetable, table).to_parquet(
+            path, engine="pyarrow", compression="snappy", index=False
+        )
+
+    return gtfs_timetable
+
+
 def read_gtfs_timetable(
     input_folder: str, departure_date: str, agencies: List[str]
 ) -> GtfsTimetable:
@@ -101,118 +236,121 @@ def read_gtfs_timetable(
     # Read agencies
     logger.debug("Read Agencies")
 
-    agencies_df = pd.read_csv(os.path.join(input_folder, "agency.txt"))
-    agencies_df = agencies_df.loc[agencies_df["agency_name"].isin(agencies)][
-        ["agency_id", "agency_name"]
-    ]
-    agency_ids = agencies_df.agency_id.values
+    agencies_df = pd.read_csv(
+        os.path.join(input_folder, "agency.txt"),
+        engine="pyarrow",
+        usecols=["agency_id", "agency_name"],
+    )
+    agencies_df = agencies_df.loc[agencies_df["agency_name"].isin(agencies)]
 
     # Read routes
     logger.debug("Read Routes")
 
-    routes = pd.read_csv(os.path.join(input_folder, "routes.txt"))
-    routes = routes[routes.agency_id.isin(agency_ids)]
-    routes = routes[
-        ["route_id", "agency_id", "route_short_name", "route_long_name", "route_type"]
-    ]
+    routes = pd.read_csv(
+        os.path.join(input_folder, "routes.txt"),
+        engine="pyarrow",
+        usecols=["route_id", "agency_id", "route_short_name", "route_long_name", "route_type"],
+    )
+    routes = routes[_isin_mask(routes["agency_id"], agencies_df["agency_id"])]
 
     # Read trips
     logger.debug("Read Trips")
 
-    trips = pd.read_csv(os.path.join(input_folder, "trips.txt"))
-    trips = trips[trips.route_id.isin(routes.route_id.values)]
-    trips = trips[
-        [
-            "route_id",
-            "service_id",
-            "trip_id",
-            "trip_headsign"
-        ]
-    ]
+    trips = pd.read_csv(
+        os.path.join(input_folder, "trips.txt"),
+        engine="pyarrow",
+        usecols=["route_id", "service_id", "trip_id", "trip_headsign"],
+    )
+    trips = trips[_isin_mask(trips["route_id"], routes["route_id"])]
 
     # Read calendar
     logger.debug("Read Calendar")
 
-    calendar = pd.read_csv(os.path.join(input_folder, "calendar.txt"), dtype={"date": str})
-    calendar = calendar[calendar.service_id.isin(trips.service_id.values)]
-
-    # Add date to trips and filter on departure date
-    trips = trips.merge(
-        calendar[["service_id", "start_date", "end_date", "monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]], 
-        on="service_id"
+    calendar = pd.read_csv(
+        os.path.join(input_folder, "calendar.txt"),
+        engine="pyarrow",
+        usecols=[
+            "service_id",
+            "monday",
+            "tuesday",
+            "wednesday",
+            "thursday",
+            "friday",
+            "saturday",
+            "sunday",
+            "start_date",
+            "end_date",
+        ],
+        # Day flags fit in int8 and yyyymmdd dates in int32
+        dtype={
+            "monday": np.int8,
+            "tuesday": np.int8,
+            "wednesday": np.int8,
+            "thursday": np.int8,
+            "friday": np.int8,
+            "saturday": np.int8,
+            "sunday": np.int8,
+            "start_date": np.int32,
+            "end_date": np.int32,
+        },
     )
+    calendar = calendar[_isin_mask(calendar["service_id"], trips["service_id"])]
+
+    # Filter trips on the departure date by finding the active services on
+    # the much smaller calendar frame first; no merge, so trips keeps its
+    # original narrow shape
     day_of_week = datetime.datetime.strptime(departure_date, "%Y%m%d").weekday()
     departure_date_as_int = int(departure_date)
-    if day_of_week == 0:
-        trips = trips[trips.start_date <= departure_date_as_int]
-        trips = trips[trips.end_date >= departure_date_as_int]
-        trips = trips[trips.monday == 1]
-    elif day_of_week == 1:
-        trips = trips[trips.start_date <= departure_date_as_int]
-        trips = trips[trips.end_date >= departure_date_as_int]
-        trips = trips[trips.tuesday == 1]
-    elif day_of_week == 2:
-        trips = trips[trips.start_date <= departure_date_as_int]
-        trips = trips[trips.end_date >= departure_date_as_int]
-        trips = trips[trips.wednesday == 1]
-    elif day_of_week == 3:
-        trips = trips[trips.start_date <= departure_date_as_int]
-        trips = trips[trips.end_date >= departure_date_as_int]
-        trips = trips[trips.thursday == 1]
-    elif day_of_week == 4:
-        trips = trips[trips.start_date <= departure_date_as_int]
-        trips = trips[trips.end_date >= departure_date_as_int]
-        trips = trips[trips.friday == 1]
-    elif day_of_week == 5:
-        trips = trips[trips.start_date <= departure_date_as_int]
-        trips = trips[trips.end_date >= departure_date_as_int]
-        trips = trips[trips.saturday == 1]
-    elif day_of_week == 6:
-        trips = trips[trips.start_date <= departure_date_as_int]
-        trips = trips[trips.end_date >= departure_date_as_int]
-        trips = trips[trips.sunday == 1]
-
-    print(trips)
+    day_column = [
+        "monday",
+        "tuesday",
+        "wednesday",
+        "thursday",
+        "friday",
+        "saturday",
+        "sunday",
+    ][day_of_week]
+    calendar_mask = (
+        (calendar.start_date.values <= departure_date_as_int)
+        & (calendar.end_date.values >= departure_date_as_int)
+        & (calendar[day_column].values == 1)
+    )
+    active_services = calendar.loc[calendar_mask, "service_id"]
+    trips = trips[_isin_mask(trips["service_id"], active_services)]
     # Read stop times
     logger.debug("Read Stop Times")
 
     stop_times = pd.read_csv(
-        os.path.join(input_folder, "stop_times.txt"), dtype={"stop_id": str}
+        os.path.join(input_folder, "stop_times.txt"),
+        engine="pyarrow",
+        usecols=["trip_id", "stop_sequence", "stop_id", "arrival_time", "departure_time"],
+        dtype={
+            "stop_id": str,
+            "arrival_time": str,
+            "departure_time": str,
+            "stop_sequence": np.int32,
+        },
     )
-    stop_times = stop_times[stop_times.trip_id.isin(trips.trip_id.values)]
-    stop_times = stop_times[
-        [
-            "trip_id",
-            "stop_sequence",
-            "stop_id",
-            "arrival_time",
-            "departure_time",
-        ]
-    ]
-    # Convert times to seconds
-    stop_times["arrival_time"] = stop_times["arrival_time"].apply(str2sec)
-    stop_times["departure_time"] = stop_times["departure_time"].apply(str2sec)
+    stop_times = stop_times[_isin_mask(stop_times["trip_id"], trips["trip_id"])]
+    # Convert times to seconds, as int32 to halve the footprint of the
+    # largest table
+    stop_times["arrival_time"] = _hms_to_sec(stop_times["arrival_time"])
+    stop_times["departure_time"] = _hms_to_sec(stop_times["departure_time"])
     # Read stops (platforms)
     logger.debug("Read Stops")
 
     stops_full = pd.read_csv(
-        os.path.join(input_folder, "stops.txt"), dtype={"stop_id": str, "parent_station": str}
+        os.path.join(input_folder, "stops.txt"),
+        engine="pyarrow",
+        usecols=["stop_id", "stop_name", "parent_station"],
+        dtype={"stop_id": str, "parent_station": str},
     )
-    stops = stops_full.loc[
-        stops_full["stop_id"].isin(stop_times.stop_id.unique())
-    ].copy()
-
-    # Read stopareas, i.e. stations
-    stopareas = stops["parent_station"].unique()
-    # stops = stops.append(.copy())
-    stops = pd.concat([stops, stops_full.loc[stops_full["stop_id"].isin(stopareas)]])
-    stops = stops[
-        [
-            "stop_id",
-            "stop_name",
-            "parent_station"
-        ]
-    ]
+    # Take the platforms referenced by stop_times plus their parent stations
+    # in one union and slice the stops table once - no concat, no duplicates
+    child_mask = _isin_mask(stops_full["stop_id"], stop_times["stop_id"])
+    needed = set(stops_full.loc[child_mask, "stop_id"])
+    needed |= set(stops_full.loc[child_mask, "parent_station"].dropna())
+    stops = stops_full.loc[_isin_mask(stops_full["stop_id"], pd.Series(sorted(needed)))]
 
     gtfs_timetable = GtfsTimetable()
     gtfs_timetable.trips = trips
@@ -244,20 +382,31 @@ def gtfs_to_pyraptor_timetable(
 
     for s in gtfs_timetable.stops.itertuples():
         if not pd.isna(s.parent_station):
-            
-            station = next((station for station in stations if station.id == s.parent_station), None)
+            station = stations.get(s.parent_station)
+            if station is None:
+                raise ValueError(
+                    f"Parent station {s.parent_station} not present in Stations"
+                )
             stop_id = f"{s.stop_name}"
             stop = Stop(s.stop_id, stop_id, station)
-            
+
             station.add_stop(stop)
             stops.add(stop)
 
 
 
-    # Stop Times
-    stop_times = defaultdict(list)
-    for stop_time in gtfs_timetable.stop_times.itertuples():
-        stop_times[stop_time.trip_id].append(stop_time)
+    # Stop Times; the frame is sorted by trip and stop sequence after the
+    # cross-folder merge in main, so each trip's rows slice out in order
+    stop_times_df = gtfs_timetable.stop_times
+    trip_row_positions = stop_times_df.groupby("trip_id", sort=False).indices
+    # Resolve the Stop object for every row in one vectorized map, so the
+    # trip loop indexes an array instead of doing a dict lookup per row
+    arr_stop = stop_times_df["stop_id"].map(stops.set_idx).values
+    if pd.isna(arr_stop).any():
+        missing = stop_times_df.loc[pd.isna(arr_stop), "stop_id"].unique()
+        raise ValueError(f"Stop IDs {missing} not present in Stops")
+    arr_arrival = stop_times_df["arrival_time"].values
+    arr_departure = stop_times_df["departure_time"].values
 
     # Trips and Trip Stop Times
     logger.debug("Add trips and trip stop times")
@@ -266,20 +415,23 @@ def gtfs_to_pyraptor_timetable(
     trip_stop_times = TripStopTimes()
 
     for trip_row in gtfs_timetable.trips.itertuples():
+        # Trips without any stop_times rows never become valid trips, so
+        # skip them before allocating anything
+        row_positions = trip_row_positions.get(trip_row.trip_id)
+        if row_positions is None:
+            continue
+
         trip = Trip()
         trip.long_name = trip_row.trip_headsign  # e.g., Sprinter
 
         # Iterate over stops
-        sort_stop_times = sorted(
-            stop_times[trip_row.trip_id], key=lambda s: int(s.stop_sequence)
-        )
-        for stopidx, stop_time in enumerate(sort_stop_times):
+        for stopidx, row in enumerate(row_positions):
             # Timestamps
-            dts_arr = stop_time.arrival_time
-            dts_dep = stop_time.departure_time
+            dts_arr = int(arr_arrival[row])
+            dts_dep = int(arr_departure[row])
 
             # Trip Stop Times
-            stop = stops.get(stop_time.stop_id)
+            stop = arr_stop[row]
 
             # GTFS files do not contain ICD supplement fare, so hard-coded here
             fare = calculate_icd_fare(trip, stop, stations) if icd_fix is True else 0
@@ -288,9 +440,9 @@ def gtfs_to_pyraptor_timetable(
             trip_stop_times.add(trip_stop_time)
             trip.add_stop_time(trip_stop_time)
 
-        # Add trip
-        if trip:
-            trips.add(trip)
+        # Add trip; Trips.add already rejects trips with fewer than 2 stop
+        # times, so no extra truthiness check per trip
+        trips.add(trip)
 
     # Routes
     logger.debug("Add routes")
@@ -304,15 +456,13 @@ def gtfs_to_pyraptor_timetable(
 
     transfers = Transfers()
     for station in stations:
-        station_stops = station.stops
-        station_transfers = [
-            Transfer(from_stop=stop_i, to_stop=stop_j, layovertime=TRANSFER_COST)
-            for stop_i in station_stops
-            for stop_j in station_stops
-            if stop_i != stop_j
-        ]
-        for st in station_transfers:
-            transfers.add(st)
+        # permutations already guarantees from_stop != to_stop
+        for from_stop, to_stop in permutations(station.stops, 2):
+            transfers.add(
+                Transfer(
+                    from_stop=from_stop, to_stop=to_stop, layovertime=TRANSFER_COST
+                )
+            )
 
     # Timetable
     timetable = Timetable(
@@ -323,6 +473,7 @@ def gtfs_to_pyraptor_timetable(
         routes=routes,
         transfers=transfers,
     )
+    timetable.build_arrays()
     timetable.counts()
 
     return timetable